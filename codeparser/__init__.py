@@ -1,33 +1,44 @@
+import hashlib
+import json
 import os
 import re
 from collections import defaultdict
 from difflib import SequenceMatcher
 from functools import lru_cache
-from typing import Dict, List, Tuple, TypeVar, Union
+from typing import Dict, List, NamedTuple, Optional, Tuple, TypeVar, Union
 
 from tree_sitter import Node, Tree
 
+from .cache import SQLiteCache
 from .provider_re import (
     RX_FUNC_MACRO_CALL,
     extract_function_name_regex,
     remove_comments_regex,
+    remove_comments_regex_bytes,
 )
 from .provider_tst import (
     capture_function_definitions,
     capture_function_name,
     function_scope,
+    get_grammar_version,
     get_parser,
+    get_statement_types,
     traverse,
+    traverse_types,
 )
 
 
 T = TypeVar("T")
 
 
+_SPLITLINES_RE = re.compile(r"\r\n|\n")
+_SPLITLINES_RE_BYTES = re.compile(rb"\r\n|\n")
+
+
 def splitlines(s: T) -> List[T]:
     if isinstance(s, bytes):
-        return re.split(rb"\r\n|\n", s)  # type: ignore
-    return re.split(r"\r\n|\n", s)  # type: ignore
+        return _SPLITLINES_RE_BYTES.split(s)  # type: ignore
+    return _SPLITLINES_RE.split(s)  # type: ignore
 
 
 def __preprocess_code(s: bytes, lang: str) -> bytes:
@@ -44,6 +55,7 @@ def __preprocess_code(s: bytes, lang: str) -> bytes:
     return s
 
 
+@lru_cache(maxsize=64)
 def parse_ast(s: bytes, lang: str):
     parser = get_parser(lang)
     # s = __preprocess_code(s, lang)
@@ -51,24 +63,58 @@ def parse_ast(s: bytes, lang: str):
     return tree
 
 
+COMMENT_TYPES = frozenset(("comment", "line_comment", "block_comment"))
+
+# bump the table version when the cached payload changes shape
+AST_CACHE = SQLiteCache("./.vuddy-ast-cache.sqlite", "comments_v1")
+
+
+class Comment(NamedTuple):
+    type: str
+    start_byte: int
+    end_byte: int
+    start_row: int
+    start_col: int
+    end_row: int
+    leaf: bool
+
+
+def _collect_comments(root: Node) -> List[Comment]:
+    return [
+        Comment(
+            node.type,
+            node.start_byte,
+            node.end_byte,
+            *node.start_point,
+            node.end_point[0],
+            node.child_count == 0,
+        )
+        for node in traverse_types(root, ret_types=COMMENT_TYPES)
+    ]
+
+
+def get_comments(s: bytes, lang: str) -> List[Comment]:
+    """Comment nodes in document order, persisted by content hash"""
+    digest = hashlib.sha256(s).digest()
+    key = f"{lang}@{get_grammar_version(lang)}"
+    payload = AST_CACHE.get(digest, key)
+    if payload is not None:
+        return [Comment(*c) for c in json.loads(payload)]
+    comments = _collect_comments(parse_ast(s, lang).root_node)
+    AST_CACHE.put(digest, key, json.dumps(comments).encode())
+    return comments
+
+
 @lru_cache(maxsize=128)
 def get_comment_ranges(s: bytes, lang: str) -> List[Tuple[int, int]]:
     """Both end including range"""
     lines = splitlines(s)
-    tree = parse_ast(s, lang)
-    comments = []
-    nodes_to_expand: List[Node] = [tree.root_node]
-    while nodes_to_expand:
-        node = nodes_to_expand.pop(0)
-        if not node.children:
-            if (
-                "comment" in node.type
-                and lines[node.start_point[0]][: node.start_point[1]].strip() == b""
-            ):
-                # start with whitespace
-                comments.append((node.start_point[0], node.end_point[0]))
-        nodes_to_expand = node.children + nodes_to_expand
-    return comments
+    return [
+        (c.start_row, c.end_row)
+        for c in get_comments(s, lang)
+        # start with whitespace
+        if c.leaf and lines[c.start_row][: c.start_col].strip() == b""
+    ]
 
 
 def _tokenize(n: Node, lang: str) -> List[bytes]:
@@ -83,24 +129,21 @@ def tokenize(s: bytes, lang: str) -> List[bytes]:
 
 
 def remove_comments_ast(code: bytes, lang: str) -> bytes:
-    tree = parse_ast(code, lang)
-    comments = []
-    nodes_to_expand: List[Node] = [tree.root_node]
-    while nodes_to_expand:
-        node = nodes_to_expand.pop(0)
-        if (
-            node.type in ("comment", "line_comment", "block_comment")
-            and node.start_byte < node.end_byte
-        ):
-            comments.append((node.start_byte, node.end_byte))
-        nodes_to_expand = node.children + nodes_to_expand
-    okcode = b""
+    comments = [
+        (c.start_byte, c.end_byte)
+        for c in get_comments(code, lang)
+        if c.type in COMMENT_TYPES
+        and c.start_byte < c.end_byte
+    ]
+    view = memoryview(code)
+    okcode = bytearray()
     last = 0
     for start, end in comments:
-        okcode += code[last:start]
-        okcode += b"\n" * code[start:end].count(b"\n")
+        okcode += view[last:start]
+        okcode += b"\n" * code.count(b"\n", start, end)
         last = end
-    return okcode + code[last:]
+    okcode += view[last:]
+    return bytes(okcode)
 
 
 def normalization(code: str) -> str:
@@ -108,25 +151,27 @@ def normalization(code: str) -> str:
     code = code.replace("\t", "    ")
 
     # strip trailing spaces
-    code1 = ""
-    lines = splitlines(code)
-    for line in lines:
-        code1 += line.rstrip() + "\n"
-
-    return code1
+    return "".join(line.rstrip() + "\n" for line in splitlines(code))
 
 
 def remove_comments(code: str, lang: str, timeout=None) -> str:
     if lang in {"C", "C++", "Java"}:
         return remove_comments_regex(code)
 
+    return remove_comments_bytes(code.encode(), lang, timeout=timeout).decode()
+
+
+def remove_comments_bytes(code: bytes, lang: str, timeout=None) -> bytes:
+    if lang in {"C", "C++", "Java"}:
+        return remove_comments_regex_bytes(code)
+
     func = remove_comments_ast
     if timeout:
         import timeout_decorator
 
         func = timeout_decorator.timeout(timeout)(func)
 
-    return func(code.encode(), lang).decode()
+    return func(code, lang)
 
 
 def treeify(n: Node) -> Dict:
@@ -139,7 +184,34 @@ def treeify(n: Node) -> Dict:
     return this
 
 
+_WS_RE = re.compile(rb"\s+")
+
+
+def _canonical_digest(code: bytes) -> bytes:
+    """Digest of the code with comments and whitespaces removed"""
+    code = _WS_RE.sub(b"", remove_comments_regex_bytes(code))
+    return hashlib.blake2b(code, digest_size=16).digest()
+
+
+_UNSET = object()
+
+
 class Func:
+    __slots__ = (
+        "lang",
+        "ctx_code",
+        "idx",
+        "node",
+        "meta",
+        # lazily computed, see the properties below
+        "_code_bytes",
+        "_code",
+        "_name",
+        "_scope",
+        "_fullname",
+        "_canonical_hash",
+    )
+
     def __init__(
         self,
         lang: str,  # the language of the function
@@ -153,6 +225,12 @@ class Func:
         self.idx = idx
         self.node = node
         self.meta = meta
+        self._code_bytes = _UNSET
+        self._code = _UNSET
+        self._name = _UNSET
+        self._scope = _UNSET
+        self._fullname = _UNSET
+        self._canonical_hash = _UNSET
 
     def __repr__(self):
         # encode to one line
@@ -160,36 +238,44 @@ class Func:
         return f'Func("{sample_code})"'
 
     def __eq__(self, x: object) -> bool:
-        if isinstance(x, (Func, str)):
-            func1 = self.code
-            func2 = x.code if isinstance(x, Func) else x
-            func1 = remove_comments_regex(func1)
-            func2 = remove_comments_regex(func2)
-            func1 = re.sub(r"\s+", "", func1)
-            func2 = re.sub(r"\s+", "", func2)
-            return func1 == func2
+        if isinstance(x, Func):
+            return self.canonical_hash == x.canonical_hash
+        if isinstance(x, str):
+            return self.canonical_hash == _canonical_digest(x.encode())
         return super().__eq__(x)
 
+    def __hash__(self):
+        return hash(self.canonical_hash)
+
+    @property
+    def canonical_hash(self) -> bytes:
+        if self._canonical_hash is _UNSET:
+            self._canonical_hash = _canonical_digest(self.code_bytes)
+        return self._canonical_hash
+
     @property
     def name(self):
-        if self.lang == "C++":
-            res = extract_ast_function_name(self.node, self.lang)
-            if res:
-                return res
-        return extract_function_name_regex(self.code)
+        if self._name is _UNSET:
+            name = None
+            if self.lang == "C++":
+                name = extract_ast_function_name(self.node, self.lang)
+            self._name = name or extract_function_name_regex(self.code)
+        return self._name
 
     @property
     def scope(self):
-        return function_scope(self.node, self.lang)
+        if self._scope is _UNSET:
+            self._scope = function_scope(self.node, self.lang)
+        return self._scope
 
     @property
     def fullname(self):
-        name = self.name
-        if name is None:
-            return None
-        if self.lang == "C++":
-            return "::".join(self.scope + [name])
-        return name
+        if self._fullname is _UNSET:
+            name = self.name
+            if name is not None and self.lang == "C++":
+                name = "::".join(self.scope + [name])
+            self._fullname = name
+        return self._fullname
 
     @property
     def start_line(self):
@@ -213,11 +299,15 @@ class Func:
 
     @property
     def code_bytes(self):
-        return self.node.text
+        if self._code_bytes is _UNSET:
+            self._code_bytes = self.node.text
+        return self._code_bytes
 
     @property
     def code(self):
-        return self.code_bytes.decode(errors="ignore")
+        if self._code is _UNSET:
+            self._code = self.code_bytes.decode(errors="ignore")
+        return self._code
 
     @property
     def code_lines(self) -> List[str]:
@@ -235,7 +325,7 @@ class Func:
         return Func.similarity2(self, rhs)
 
     def stmt_map(self):
-        return get_stmt_map(self.node)
+        return get_stmt_map(self.node, self.lang)
 
 
 EmptyFunc = object()
@@ -246,12 +336,17 @@ def is_func_macro(func_name: str):
     pass
 
 
-def get_stmt_map(node: Node):
+def get_stmt_map(node: Node, lang: Optional[str] = None):
     def is_leaf(n):
         return "statement" in n.type and n.type != "compound_statement"
 
+    if lang:
+        stmts = traverse_types(node, ret_types=get_statement_types(lang))
+    else:
+        stmts = traverse(node, descend=None, ret=is_leaf)
+
     stmt_map = defaultdict(set)
-    for stmt_node in traverse(node, descend=None, ret=is_leaf):
+    for stmt_node in stmts:
         for line in range(stmt_node.start_point[0], stmt_node.end_point[0] + 1):
             stmt_map[line].add(stmt_node)
 
@@ -276,8 +371,11 @@ def extract_ast_functions(
     functions = []
     func_seq = 0
 
+    # no error anywhere in the tree, skip the per-function checks
+    root_clean = not tree.root_node.has_error
+
     for node in captures:
-        if node.has_error and not keep_error_node:
+        if not keep_error_node and not root_clean and node.has_error:
             continue
         functions.append(
             Func(
@@ -294,7 +392,7 @@ def extract_ast_functions(
 
 
 def extract_functions(
-    src: Union[str, bytes, Tree],
+    src: Union[str, bytes, bytearray, memoryview, Tree],
     lang: str,
     timeout=None,
     _remove_comments=False,
@@ -309,6 +407,11 @@ def extract_functions(
         if _remove_comments:
             src = remove_comments(src, lang, timeout=timeout)
         src = src.encode("utf-8", errors="ignore")
+    elif isinstance(src, (bytes, bytearray, memoryview)):
+        # parse_ast is memoized, it needs an immutable, hashable buffer
+        src = bytes(src)
+        if _remove_comments:
+            src = remove_comments_bytes(src, lang, timeout=timeout)
 
     if isinstance(src, bytes):
         src = parse_ast(src, lang)
@@ -367,12 +470,201 @@ ABST_WITH_NUM = 1
 ABST_AS_TYPE = 2
 ABST_NON_SYS = 4
 
-SYS_FUNC = set()
 DIR = os.path.dirname(os.path.abspath(__file__))
 with open(DIR + "/sys_func.txt", "rb") as f:
-    SYS_FUNC.update(f.read().splitlines())
+    _sys_func = f.read().splitlines()
 with open(DIR + "/std_func.txt", "rb") as f:
-    SYS_FUNC.update(f.read().splitlines())
+    _sys_func += f.read().splitlines()
+SYS_FUNC = frozenset(_sys_func)
+del _sys_func
+
+
+class _AbstractState:
+    """Options and symbol tables shared by the abstract_func_clike handlers"""
+
+    def __init__(self, **options):
+        self.__dict__.update(options)
+        self.output = []
+        self.emit = self.output.append
+        self.lvar_map = {}
+        self.symbol_map = {}
+        self.label_map = {}
+        self.field_map = {}
+        self.vtype_map = {}
+        self.counts = defaultdict(int)
+        self.decl_roles = {}
+
+    def alloc_number(self, elm_type):
+        res = f"{elm_type}{self.counts[elm_type]}"
+        self.counts[elm_type] += 1
+        return res
+
+
+def _abst_default(node: Node, parent: Node, st: _AbstractState):
+    st.emit(node.text)
+
+
+def _abst_skip(node: Node, parent: Node, st: _AbstractState):
+    pass
+
+
+def _abst_identifier(node: Node, parent: Node, st: _AbstractState):
+    role = st.decl_roles.get(node.id)
+    if role == "parameter_declaration":
+        # int foo(int "a", int b)
+        if not st.abstract_fparam:
+            st.emit(node.text)
+        elif st.abstract_fparam == ABST_WITH_NUM:
+            st.lvar_map[node.text] = st.alloc_number("FPARAM").encode()
+            st.emit(st.lvar_map[node.text])
+        else:
+            st.lvar_map[node.text] = b"FPARAM"
+            st.emit(st.lvar_map[node.text])
+
+    elif role == "declaration":
+        # int "x"
+        if not st.abstract_lvar:
+            st.emit(node.text)
+        elif st.abstract_lvar == ABST_WITH_NUM:
+            st.lvar_map[node.text] = st.alloc_number("LVAR").encode()
+            st.emit(st.lvar_map[node.text])
+        else:
+            st.lvar_map[node.text] = b"LVAR"
+            st.emit(st.lvar_map[node.text])
+
+    elif parent.type == "call_expression":
+        # res = "func"(1, 2, 3);
+        if not st.abstract_func_call:
+            st.emit(node.text)
+            return
+
+        if st.abstract_func_call & ABST_WITH_NUM:
+            raise NotImplementedError
+
+        if st.abstract_func_call & ABST_NON_SYS:
+            # only abstract non-standard functions
+            text = node.text
+            st.emit(text if text in SYS_FUNC else b"FCALL")
+        else:
+            st.emit(b"FCALL")
+
+    elif node.text in st.lvar_map:
+        st.emit(st.lvar_map.get(node.text))
+    elif st.abstract_gsym:
+        # maybe a symbol defined in outer scope
+        if st.abstract_gsym == ABST_WITH_NUM:
+            if node.text not in st.symbol_map:
+                st.symbol_map[node.text] = st.alloc_number("GSYM").encode()
+            st.emit(st.symbol_map[node.text])
+        else:
+            st.emit(b"GSYM")
+    else:
+        st.emit(node.text)
+
+
+def _abst_field(node: Node, parent: Node, st: _AbstractState):
+    if not st.abstract_field:
+        st.emit(node.text)
+    elif st.abstract_lvar == ABST_WITH_NUM:
+        if node.text not in st.field_map:
+            st.field_map[node.text] = st.alloc_number("FIELD").encode()
+        st.emit(st.field_map[node.text])
+    else:
+        st.field_map[node.text] = b"FIELD"
+        st.emit(st.field_map[node.text])
+
+
+def _abst_statement_identifier(node: Node, parent: Node, st: _AbstractState):
+    if parent.type == "labeled_statement":
+        # "err":
+        if not st.abstract_label:
+            st.emit(node.text)
+        elif st.abstract_lvar == ABST_WITH_NUM:
+            st.label_map[node.text] = st.alloc_number("LABEL").encode()
+            st.emit(st.label_map[node.text])
+        else:
+            st.emit(b"LABEL")
+
+    elif parent.type == "goto_statement":
+        # goto "err";
+        if not st.abstract_label:
+            pass
+        elif st.abstract_lvar == ABST_WITH_NUM:
+            if node.text not in st.label_map:
+                st.label_map[node.text] = st.alloc_number("LABEL").encode()
+            st.emit(st.label_map[node.text])
+        else:
+            st.emit(b"LABEL")
+
+    else:
+        st.emit(node.text)
+
+
+def _abst_type(node: Node, parent: Node, st: _AbstractState):
+    # "int" x;
+    if not st.abstract_type:
+        st.emit(node.text)
+    elif st.abstract_type == ABST_WITH_NUM:
+        if node.text not in st.vtype_map:
+            st.vtype_map[node.text] = st.alloc_number("VTYPE").encode()
+        st.emit(st.vtype_map[node.text])
+    else:
+        st.emit(b"VTYPE")
+
+
+def _abst_string(node: Node, parent: Node, st: _AbstractState):
+    st.emit(b"STR" if st.abstract_literal else node.text)
+
+
+def _abst_number(node: Node, parent: Node, st: _AbstractState):
+    st.emit(b"NUM" if st.abstract_literal else node.text)
+
+
+_COMMENT_KEYWORD_SKIP = COMMENT_TYPES | frozenset(
+    (
+        "static",
+        "const",
+        "volatile",
+        "inline",
+        "extern",
+        "register",
+        "typedef",
+    )
+)
+
+_ABST_HANDLERS = {
+    "identifier": _abst_identifier,
+    "field_identifier": _abst_field,
+    "statement_identifier": _abst_statement_identifier,
+    "sized_type_specifier": _abst_type,
+    "primitive_type": _abst_type,
+    "type_identifier": _abst_type,
+    "concatenated_string": _abst_string,
+    "string_literal": _abst_string,
+    "char_literal": _abst_string,
+    "number_literal": _abst_number,
+    **{t: _abst_skip for t in _COMMENT_KEYWORD_SKIP},
+}
+
+_DECL_TYPES = frozenset(("declaration", "parameter_declaration"))
+
+_ABST_LEAF_TYPES = frozenset(
+    (
+        "concatenated_string",
+        "string_literal",
+        "char_literal",
+        "number_literal",
+        "sized_type_specifier",
+    )
+)
+
+
+def _abst_is_leaf(n: Node):
+    return n.child_count == 0 or n.type in _ABST_LEAF_TYPES
+
+
+def _abst_is_inner(n: Node):
+    return not _abst_is_leaf(n)
 
 
 def abstract_func_clike(
@@ -393,177 +685,38 @@ def abstract_func_clike(
         func = tree.root_node
 
     assert isinstance(func, Node)
-    output = []
-
-    # states
-    lvar_map = {}
-    symbol_map = {}
-    label_map = {}
-    field_map = {}
-    vtype_map = {}
 
-    counts = defaultdict(int)
-
-    def alloc_number(elm_type):
-        res = f"{elm_type}{counts[elm_type]}"
-        counts[elm_type] += 1
-        return res
-
-    def is_leaf(n):
-        return not n.children or n.type in [
-            "concatenated_string",
-            "string_literal",
-            "char_literal",
-            "number_literal",
-            "sized_type_specifier",
-        ]
-
-    def is_inner(n):
-        return not is_leaf(n)
-
-    for node in traverse(func, descend=is_inner, ret=is_leaf):
+    st = _AbstractState(
+        abstract_lvar=abstract_lvar,
+        abstract_fparam=abstract_fparam,
+        abstract_label=abstract_label,
+        abstract_gsym=abstract_gsym,
+        abstract_field=abstract_field,
+        abstract_type=abstract_type,
+        abstract_literal=abstract_literal,
+        abstract_func_call=abstract_func_call,
+    )
+    emit = st.emit
+    handlers = _ABST_HANDLERS
+
+    # declaration type for every node on a declarator chain, replaces
+    # walking up from each identifier with is_decl_lvar/is_decl_fparam
+    for decl in traverse_types(func, ret_types=_DECL_TYPES):
+        declarator = decl.child_by_field_name("declarator")
+        while declarator is not None:
+            st.decl_roles[declarator.id] = decl.type
+            declarator = declarator.child_by_field_name("declarator")
+
+    for node in traverse(func, descend=_abst_is_inner, ret=_abst_is_leaf):
+        parent = node.parent
         if (
-            node.parent.type == "function_declarator"
-            and node == node.parent.child_by_field_name("declarator")
+            parent.type == "function_declarator"
+            and node == parent.child_by_field_name("declarator")
         ):
             # int "ns::foo"(int a, int b) {
-            if not abstract_fname:
-                output.append(node.text)
-                continue
-            output.append(b"FNAME")
-
-        elif node.type == "identifier" and is_decl_fparam(node):
-            # int foo(int "a", int b)
-            if not abstract_fparam:
-                output.append(node.text)
-                continue
-            elif abstract_fparam == ABST_WITH_NUM:
-                lvar_map[node.text] = alloc_number("FPARAM").encode()
-                output.append(lvar_map[node.text])
-            else:
-                lvar_map[node.text] = b"FPARAM"
-                output.append(lvar_map[node.text])
-
-        elif node.type == "identifier" and is_decl_lvar(node):
-            # int "x"
-            if not abstract_lvar:
-                output.append(node.text)
-                continue
-            elif abstract_lvar == ABST_WITH_NUM:
-                lvar_map[node.text] = alloc_number("LVAR").encode()
-                output.append(lvar_map[node.text])
-            else:
-                lvar_map[node.text] = b"LVAR"
-                output.append(lvar_map[node.text])
-
-        elif node.type == "field_identifier":
-            if not abstract_field:
-                output.append(node.text)
-                continue
-            elif abstract_lvar == ABST_WITH_NUM:
-                if node.text not in field_map:
-                    field_map[node.text] = alloc_number("FIELD").encode()
-                output.append(field_map[node.text])
-            else:
-                field_map[node.text] = b"FIELD"
-                output.append(field_map[node.text])
-
-        elif (
-            node.parent.type == "labeled_statement"
-            and node.type == "statement_identifier"
-        ):
-            # "err":
-            if not abstract_label:
-                output.append(node.text)
-                continue
-            elif abstract_lvar == ABST_WITH_NUM:
-                label_map[node.text] = alloc_number("LABEL").encode()
-                output.append(label_map[node.text])
-            else:
-                output.append(b"LABEL")
-
-        elif (
-            node.parent.type == "goto_statement" and node.type == "statement_identifier"
-        ):
-            # goto "err";
-            if not abstract_label:
-                continue
-            elif abstract_lvar == ABST_WITH_NUM:
-                if node.text not in label_map:
-                    label_map[node.text] = alloc_number("LABEL").encode()
-                output.append(label_map[node.text])
-            else:
-                output.append(b"LABEL")
-
-        elif node.type in ("sized_type_specifier", "primitive_type", "type_identifier"):
-            # "int" x;
-            if not abstract_type:
-                output.append(node.text)
-                continue
-            elif abstract_type == ABST_WITH_NUM:
-                if node.text not in vtype_map:
-                    vtype_map[node.text] = alloc_number("VTYPE").encode()
-                output.append(vtype_map[node.text])
-            else:
-                output.append(b"VTYPE")
-
-        elif node.type in [
-            "concatenated_string",
-            "string_literal",
-            "char_literal",
-            "number_literal",
-        ]:
-            if not abstract_literal:
-                output.append(node.text)
-                continue
-            output.append(
-                b"STR"
-                if node.type
-                in ["concatenated_string", "string_literal", "char_literal"]
-                else b"NUM"
-            )
-
-        elif node.parent.type == "call_expression" and node.type == "identifier":
-            # res = "func"(1, 2, 3);
-            if not abstract_func_call:
-                output.append(node.text)
-                continue
-
-            if abstract_func_call & ABST_WITH_NUM:
-                raise NotImplementedError
-
-            if abstract_func_call & ABST_NON_SYS:
-                # only abstract non-standard functions
-                output.append(node.text if node.text in SYS_FUNC else b"FCALL")
-            else:
-                output.append(b"FCALL")
-
-        elif node.type == "identifier":
-            if node.text in lvar_map:
-                output.append(lvar_map.get(node.text))
-            elif abstract_gsym:
-                # maybe a symbol defined in outer scope
-                if abstract_gsym == ABST_WITH_NUM:
-                    if node.text not in symbol_map:
-                        symbol_map[node.text] = alloc_number("GSYM").encode()
-                    output.append(symbol_map[node.text])
-                else:
-                    output.append(b"GSYM")
-            else:
-                output.append(node.text)
-
-        elif "comment" in node.type or node.type in (
-            "static",
-            "const",
-            "volatile",
-            "inline",
-            "extern",
-            "register",
-            "typedef",
-        ):
-            pass
+            emit(b"FNAME" if abstract_fname else node.text)
+            continue
 
-        else:
-            output.append(node.text)
+        handlers.get(node.type, _abst_default)(node, parent, st)
 
-    return output
+    return st.output
@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+
+class SQLiteCache:
+    """Persistent blob store keyed by (content digest, lang), never invalidated"""
+
+    def __init__(self, path: str, table: str):
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        # sqlite connections must not be shared across threads or forks
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.pid = os.getpid()
+            try:
+                conn = sqlite3.connect(self.path, timeout=30)
+                conn.execute("PRAGMA journal_mode=WAL")
+                # a lost write after a power failure is only a cache miss
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.table} "
+                    "(hash BLOB, lang TEXT, payload BLOB, PRIMARY KEY (hash, lang))"
+                )
+            except sqlite3.Error:
+                conn = None
+            self._local.conn = conn
+        return self._local.conn
+
+    def get(self, digest: bytes, lang: str) -> Optional[bytes]:
+        conn = self._connect()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                f"SELECT payload FROM {self.table} WHERE hash = ? AND lang = ?",
+                (digest, lang),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def put(self, digest: bytes, lang: str, payload: bytes):
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute(
+                    f"INSERT OR IGNORE INTO {self.table} VALUES (?, ?, ?)",
+                    (digest, lang, payload),
+                )
+        except sqlite3.Error:
+            pass
@@ -10,4 +10,6 @@ CLIKE_RESERVED_KEYWORDS = (
 
 CLIKE_BAD_FUNCNAME = CLIKE_RESERVED_KEYWORDS
 
+CLIKE_BAD_FUNCNAME_BYTES = frozenset(k.encode() for k in CLIKE_BAD_FUNCNAME)
+
 CLIKE_BAD_TYPENAME = set(CLIKE_RESERVED_KEYWORDS) - {'auto', 'char', 'float', 'int', 'long', 'double', 'signed', 'unsigned', 'void'}
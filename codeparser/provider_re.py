@@ -1,6 +1,12 @@
 import re
 from typing import Optional
 
+try:
+    # DFA-based matching, linear in the input size
+    import re2
+except ImportError:
+    re2 = None
+
 RX_FUNC_CALL = re.compile(r"(\w+)\s*\(")
 
 # FUNC_MACROS = (
@@ -19,6 +25,17 @@ RX_CLIKE_COMMENT = re.compile(
     r'//.*?$|/\*.*?\*/|\'(?:\\.|[^\\\'])*\'|"(?:\\.|[^\\"])*"',
     re.DOTALL | re.MULTILINE
 )
+RX_CLIKE_COMMENT_BYTES = re.compile(
+    RX_CLIKE_COMMENT.pattern.encode(),
+    re.DOTALL | re.MULTILINE
+)
+
+if re2:
+    _RX_CLIKE_COMMENT = re2.compile("(?sm)" + RX_CLIKE_COMMENT.pattern)
+    _RX_CLIKE_COMMENT_BYTES = re2.compile(b"(?sm)" + RX_CLIKE_COMMENT_BYTES.pattern)
+else:
+    _RX_CLIKE_COMMENT = RX_CLIKE_COMMENT
+    _RX_CLIKE_COMMENT_BYTES = RX_CLIKE_COMMENT_BYTES
 
 
 def __replacer(match):
@@ -29,9 +46,22 @@ def __replacer(match):
         return s
 
 
+def __replacer_bytes(match):
+    s = match.group(0)
+    if s.startswith(b'/'):
+        return b" "
+    else:
+        return s
+
+
 def remove_comments_regex(code: str):
     """ remove c-like source code comment """
-    return re.sub(RX_CLIKE_COMMENT, __replacer, code)
+    return _RX_CLIKE_COMMENT.sub(__replacer, code)
+
+
+def remove_comments_regex_bytes(code: bytes):
+    """ remove c-like source code comment """
+    return _RX_CLIKE_COMMENT_BYTES.sub(__replacer_bytes, code)
 
 
 def extract_function_name_regex(text: str) -> Optional[str]:
@@ -1,13 +1,16 @@
+import threading
+from bisect import bisect_left
 from collections import deque
 from functools import lru_cache
-from typing import Callable, List, Optional
+from importlib import metadata
+from typing import Callable, Dict, FrozenSet, List, Optional
 
 from tree_sitter import Language, Node, Parser
 import tree_sitter_c
 import tree_sitter_cpp
 import tree_sitter_java
 
-from .const import CLIKE_BAD_FUNCNAME
+from .const import CLIKE_BAD_FUNCNAME_BYTES
 
 
 class ParseLangNotSupportError(Exception):
@@ -36,12 +39,39 @@ def get_language(lang: str) -> Language:
 
 
 @lru_cache()
+def get_grammar_version(lang: str) -> str:
+    """Version of the grammar package, parse results change with it"""
+    dist = {"C": "tree-sitter-c", "C++": "tree-sitter-cpp", "Java": "tree-sitter-java"}
+    try:
+        version = metadata.version(dist[lang])
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    return f"{version}/abi{get_language(lang).version}"
+
+
+_TLS = threading.local()
+
+
 def get_parser(lang: str) -> Parser:
-    parser = Parser()
-    parser.language = get_language(lang)
+    """Return a Parser owned by the calling thread, parsers are not thread-safe"""
+    parser = getattr(_TLS, lang, None)
+    if parser is None:
+        parser = Parser()
+        parser.language = get_language(lang)
+        setattr(_TLS, lang, parser)
     return parser
 
 
+@lru_cache()
+def get_statement_types(lang: str) -> FrozenSet[str]:
+    """Node types of `lang` that are statements, except compound_statement"""
+    language = get_language(lang)
+    kinds = (language.node_kind_for_id(i) for i in range(language.node_kind_count))
+    return frozenset(
+        k for k in kinds if k and "statement" in k and k != "compound_statement"
+    )
+
+
 @lru_cache()
 def get_query(lang: str, query: str):
     return get_language(lang).query(query)
@@ -111,6 +141,32 @@ FUNCTION_DEFINITION_CAPTURES = {
     "Java": "(method_declaration) @ret (constructor_declaration) @ret",
 }
 
+# definitions and names in a single query, so a file is matched only once
+FUNCTION_CAPTURES = {
+    lang: FUNCTION_DEFINITION_CAPTURES[lang].replace("@ret", "@function")
+    + "\n"
+    + FUNCTION_DECL_CAPTURES[lang].replace("@ret", "@name")
+    for lang in FUNCTION_DEFINITION_CAPTURES
+}
+
+
+@lru_cache(maxsize=32)
+def capture_functions(root: Node, lang: str) -> Dict[str, List[Node]]:
+    """Captures of FUNCTION_CAPTURES under root, grouped by capture name"""
+    if not (capture := FUNCTION_CAPTURES.get(lang)):
+        raise ParseLangNotSupportError(lang)
+
+    groups = {"function": [], "name": []}
+    for node, name in captures(lang, capture, root):
+        groups[name].append(node)
+    return groups
+
+
+@lru_cache(maxsize=32)
+def _function_names_index(root: Node, lang: str):
+    names = sorted(capture_functions(root, lang)["name"], key=lambda n: n.start_byte)
+    return [n.start_byte for n in names], names
+
 
 def capture_class(node: Node, lang: str):
     if not (capture := CLASS_QUERY.get(lang)):
@@ -131,19 +187,22 @@ def capture_class_name(node: Node, lang: str):
 
 
 def capture_function_definitions(n: Node, lang: str):
-    if not (capture := FUNCTION_DEFINITION_CAPTURES.get(lang)):
-        raise ParseLangNotSupportError(lang)
-
-    node = [node for node, _ in captures(lang, capture, n)]
+    node = capture_functions(n, lang)["function"]
 
     # remove node that inside another nodes
-    node = [
-        n
-        for n in node
-        if not any(
-            n.start_byte > x.start_byte and n.end_byte < x.end_byte for x in node
-        )
-    ]
+    spans = [(n.start_byte, n.end_byte) for n in node]
+    nested = set()
+    outer_end = -1  # max end_byte among nodes starting strictly before
+    group_start, group_end = -1, -1
+    for i in sorted(range(len(spans)), key=lambda i: spans[i][0]):
+        start, end = spans[i]
+        if start != group_start:
+            outer_end = max(outer_end, group_end)
+            group_start, group_end = start, -1
+        if outer_end > end:
+            nested.add(i)
+        group_end = max(group_end, end)
+    node = [n for i, n in enumerate(node) if i not in nested]
 
     # validate
     node = [
@@ -158,16 +217,25 @@ def capture_function_definitions(n: Node, lang: str):
 
 
 def capture_function_name(node: Node, lang: str):
-    if not (capture := FUNCTION_DECL_CAPTURES.get(lang)):
-        raise ParseLangNotSupportError(lang)
-
-    res = captures(lang, capture, node)
-    if not res:
+    root = node
+    while root.parent:
+        root = root.parent
+    starts, names = _function_names_index(root, lang)
+
+    # first name inside the node, in document order
+    res = None
+    end = node.end_byte
+    for i in range(bisect_left(starts, node.start_byte), len(names)):
+        if starts[i] >= end:
+            break
+        if names[i].end_byte <= end:
+            res = names[i]
+            break
+    if res is None:
         return None
-    res = res[0][0]
 
     # validate
-    if res.text.decode() in CLIKE_BAD_FUNCNAME:
+    if res.text in CLIKE_BAD_FUNCNAME_BYTES:
         return None
 
     # C++ qualified identifier, e.g. Class::method
@@ -257,6 +325,30 @@ def traverse(
                 break
 
 
+def traverse_types(
+    node: Node,
+    *,
+    ret_types: Optional[FrozenSet[str]] = None,
+    descend_types: Optional[FrozenSet[str]] = None,
+):
+    """Same as traverse(), filtering by node type instead of callbacks"""
+    cursor = node.walk()
+    while True:
+        node_type = cursor.node.type
+        if ret_types is None or node_type in ret_types:
+            yield cursor.node
+        if descend_types is None or node_type in descend_types:
+            if cursor.goto_first_child():
+                continue
+        if cursor.goto_next_sibling():
+            continue
+        while True:
+            if not cursor.goto_parent():
+                return
+            if cursor.goto_next_sibling():
+                break
+
+
 def traverse_bfs(node: Node, descend: Optional[Callable[[Node], bool]] = None):
     """Traverse the tree breadth-first, yielding each node"""
     queue = deque()
@@ -1,8 +1,12 @@
+import hashlib
+import json
+import os
 import shutil
 import subprocess
 import tempfile
 from os import PathLike
 from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
 
 # Check exist for github-linguist
 if not shutil.which("github-linguist"):
@@ -11,6 +15,51 @@ if not shutil.which("github-linguist"):
         "Please refer to https://github.com/github-linguist/linguist for installation."
     )
 
+# extensions that linguist maps to exactly one language, case sensitive
+# (".C" and ".H" are C++)
+EXTENSION_LANGUAGES = {
+    ".c": "C",
+    ".cc": "C++",
+    ".cpp": "C++",
+    ".cxx": "C++",
+    ".c++": "C++",
+    ".hpp": "C++",
+    ".hxx": "C++",
+    ".h++": "C++",
+    ".java": "Java",
+}
+
+# lowercased extensions linguist may assign to a language, "" for none
+LANGUAGE_EXTENSIONS = {
+    "C": frozenset({"", ".c", ".cats", ".h", ".idc"}),
+    "C++": frozenset(
+        {
+            "",
+            ".c++",
+            ".cc",
+            ".cp",
+            ".cpp",
+            ".cppm",
+            ".cxx",
+            ".h",
+            ".h++",
+            ".hh",
+            ".hpp",
+            ".hxx",
+            ".inc",
+            ".inl",
+            ".ino",
+            ".ipp",
+            ".ixx",
+            ".re",
+            ".tcc",
+            ".tpp",
+            ".txx",
+        }
+    ),
+    "Java": frozenset({"", ".jav", ".java", ".jsh"}),
+}
+
 
 def detect_language(
     file: PathLike = None,
@@ -33,6 +82,17 @@ def detect_language(
     else:
         raise ValueError("Either file or src and suffix must be provided.")
 
+    key = (suffix, hashlib.sha1(src).digest())
+    if key not in _LANGUAGE_CACHE:
+        _LANGUAGE_CACHE[key] = _detect_language(src, suffix)
+    return _LANGUAGE_CACHE[key]
+
+
+# (suffix, sha1 of content) -> language
+_LANGUAGE_CACHE: Dict[Tuple[str, bytes], str] = {}
+
+
+def _detect_language(src: bytes, suffix: str):
     with tempfile.NamedTemporaryFile("wb", suffix=suffix) as tmp_f:
         # create temporary file to allow linguistic to escape .gitignore
         tmp_f.write(src)
@@ -47,3 +107,54 @@ def detect_language(
         language = language.split(":")[1].strip()
         # return value: ['C++', 'C', 'Objective-c']
         return language
+
+
+def detect_languages_batch(
+    files: Iterable[PathLike],
+) -> Dict[Path, Optional[str]]:
+    """
+    Detect the language of many files with a single github-linguist run
+    Files linguist does not count as code (prose, data, binaries) or cannot
+    read map to None
+    """
+    files = [Path(file) for file in files]
+    if not files:
+        return {}
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # linguist only scans git repositories. Files are renamed to escape
+        # .gitignore and the path based vendor/documentation rules.
+        names = {}
+        for i, file in enumerate(files):
+            name = f"{i}{file.suffix}"
+            try:
+                os.link(file, os.path.join(tmpdir, name))
+            except OSError:
+                try:
+                    shutil.copyfile(file, os.path.join(tmpdir, name))
+                except OSError:
+                    continue
+            names[name] = file
+
+        # keep the user's signing and hooks away from the throwaway commit
+        git = ["git", "-C", tmpdir]
+        for config in (
+            "user.name=vuddy",
+            "user.email=vuddy@",
+            "commit.gpgsign=false",
+            "core.hooksPath=/dev/null",
+        ):
+            git += ["-c", config]
+        subprocess.check_call(git + ["init", "-q"])
+        subprocess.check_call(git + ["add", "-A"])
+        subprocess.check_call(git + ["commit", "-q", "--allow-empty", "-m", "batch"])
+        output = subprocess.check_output(
+            ["github-linguist", "--breakdown", "--json", tmpdir], text=True
+        )
+
+    result = dict.fromkeys(files)
+    for language, info in json.loads(output).items():
+        for name in info.get("files", []):
+            if name in names:
+                result[names[name]] = language
+    return result
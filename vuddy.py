@@ -1,10 +1,11 @@
 import json
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
 import fire
 import vuddy_util
-from joblib import Parallel, delayed
+from joblib import Parallel, delayed, effective_n_jobs
 from loguru import logger
 
 VUDDY_RESULT_DIR = "./vuddy-result"
@@ -21,7 +22,7 @@ def clean(label, version):
         shutil.rmtree(exploded)
 
 
-def run_vuddy(label, src_path, version):
+def run_vuddy(label, src_path, version, jobs=None):
     output = f"{VUDDY_RESULT_DIR}/vuddy_{label}_{vuddy_util.escape(version)}.jsonl"
     if os.path.exists(output):
         return
@@ -29,7 +30,7 @@ def run_vuddy(label, src_path, version):
     exploded = f"{VUDDY_EXPLODED_DIR}/{label}_{vuddy_util.escape(version)}/"
     if not os.path.exists(exploded):
         with vuddy_util.TempRepo(src_path, version) as src_clone:
-            vuddy_util.explode(src_clone, exploded)
+            vuddy_util.explode(src_clone, exploded, max_workers=jobs)
 
     basename = os.path.basename(exploded.rstrip("/"))
     hidx = os.path.join(exploded, "hidx", f"hashmark_4_{basename}.hidx")
@@ -54,11 +55,35 @@ def run_vuddy(label, src_path, version):
             f.write("\n")
 
 
-def run_all(projects):
-    Parallel()(
-        delayed(run_vuddy)(row["label"], row["project_dir"], row["version"])
+def run_all(projects, n_jobs=-1):
+    # threads, like run_versions: the parsing happens in the process pool of
+    # each explode, which gets its share of the cores
+    jobs = max(1, os.cpu_count() // effective_n_jobs(n_jobs))
+    results = Parallel(
+        n_jobs=n_jobs,
+        backend="threading",
+        batch_size="auto",
+        return_as="generator_unordered",
+    )(
+        delayed(run_vuddy)(row["label"], row["project_dir"], row["version"], jobs)
         for row in projects
     )
+    for _ in results:
+        pass
+
+
+def run_versions(label, src_path, versions, n_jobs=None):
+    """Run vuddy on several versions of one repository concurrently"""
+    n_jobs = n_jobs or min(os.cpu_count(), 8)
+    # checkout, hmark and upload are mostly spent in subprocesses and I/O,
+    # explode gets its share of the cores for parsing
+    jobs = max(1, os.cpu_count() // n_jobs)
+    with ThreadPoolExecutor(max_workers=n_jobs) as ex:
+        futures = [
+            ex.submit(run_vuddy, label, src_path, version, jobs)
+            for version in versions
+        ]
+        return [f.result() for f in futures]
 
 
 if __name__ == "__main__":
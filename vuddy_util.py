@@ -1,10 +1,19 @@
+import hashlib
+import itertools
 import json
+import multiprocessing
 import os
 import re
 import shutil
+import struct
 import subprocess as sp
 import tempfile
+import threading
 import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
 from typing import List, Union
 
 import codeparser
@@ -12,7 +21,15 @@ import git
 import linguist
 import requests
 import timeout_decorator
+from codeparser.cache import SQLiteCache
 from git import Repo
+from requests.adapters import HTTPAdapter
+
+try:
+    # reflink copies, linux only
+    import fcntl
+except ImportError:
+    fcntl = None
 
 HMARK = os.path.abspath("./hmark_4.0.1_linux_x64")
 
@@ -21,13 +38,68 @@ def escape(s):
     return s.replace("/", "_")
 
 
+def _traverse_files(dir_path="."):
+    """Yield (path, path relative to dir_path) of every file under dir_path"""
+    # same order and symlink handling as os.walk, but DirEntry.is_dir() uses
+    # the d_type from readdir instead of one stat per entry
+    stack = [(dir_path, "")]
+    while stack:
+        root, rel_root = stack.pop()
+        try:
+            scandir_it = os.scandir(root)
+        except OSError:
+            continue
+
+        files, dirs = [], []
+        with scandir_it:
+            for entry in scandir_it:
+                rel_path = os.path.join(rel_root, entry.name)
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    files.append((entry.path, rel_path))
+                elif not entry.is_symlink():
+                    dirs.append((entry.path, rel_path))
+
+        yield from files
+        stack.extend(reversed(dirs))
+
+
 def traverse_files(dir_path=".", relative=False):
-    for root, _, files in os.walk(dir_path):
-        for file in files:
-            if relative:
-                yield os.path.relpath(os.path.join(root, file), dir_path)
-            else:
-                yield os.path.join(root, file)
+    for path, rel_path in _traverse_files(dir_path):
+        yield rel_path if relative else path
+
+
+def _traverse_src_files(dir_path: str, langs: Union[str, List[str]]):
+    """Yield (path, relative path, language) of source files in `langs`"""
+    if isinstance(langs, str):
+        langs = [langs]
+    # extensions that can not be any of langs are dropped up front
+    candidates = None
+    if all(lang in linguist.LANGUAGE_EXTENSIONS for lang in langs):
+        candidates = frozenset().union(
+            *(linguist.LANGUAGE_EXTENSIONS[lang] for lang in langs)
+        )
+    files = []
+    ambiguous = []
+    for path, rel_path in _traverse_files(dir_path):
+        ext = os.path.splitext(rel_path)[1]
+        lang = linguist.EXTENSION_LANGUAGES.get(ext)
+        if lang is None:
+            if candidates is not None and ext.lower() not in candidates:
+                continue
+            ambiguous.append(path)
+        files.append((path, rel_path, lang))
+
+    # only ask linguist about files the extension does not settle, e.g. ".h"
+    detected = linguist.detect_languages_batch(ambiguous)
+    for path, rel_path, lang in files:
+        if lang is None:
+            lang = detected[Path(path)]
+        if lang in langs:
+            yield path, rel_path, lang
 
 
 def traverse_src_files(
@@ -35,41 +107,160 @@ def traverse_src_files(
     langs: Union[str, List[str]],
     relative: bool = False,
 ):
-    if isinstance(langs, str):
-        langs = [langs]
-    for file in traverse_files(dir_path, relative):
-        lang = linguist.detect_language(os.path.join(dir_path, file))
-        if lang in langs:
-            yield file, lang
+    for path, rel_path, lang in _traverse_src_files(dir_path, langs):
+        yield rel_path if relative else path, lang
+
+
+# (start_line, code_bytes) of every function, keyed by source content.
+# Bump the table version when extract_functions changes its output
+EXPLODE_CACHE = SQLiteCache("./.vuddy-explode-cache.sqlite", "functions_v1")
+
+# start_line, len(code_bytes), followed by code_bytes
+_FUNC_HEADER = struct.Struct("<II")
+
+
+def _pack_funcs(funcs):
+    parts = []
+    for start_line, code_bytes in funcs:
+        parts.append(_FUNC_HEADER.pack(start_line, len(code_bytes)))
+        parts.append(code_bytes)
+    return b"".join(parts)
+
+
+def _unpack_funcs(payload):
+    funcs = []
+    offset = 0
+    while offset < len(payload):
+        start_line, size = _FUNC_HEADER.unpack_from(payload, offset)
+        offset += _FUNC_HEADER.size
+        funcs.append((start_line, payload[offset : offset + size]))
+        offset += size
+    return funcs
+
+
+def _extract_cached(file_content, lang, rel_path):
+    digest = hashlib.sha256(file_content).digest()
+    key = f"{lang}@{codeparser.get_grammar_version(lang)}"
+    payload = EXPLODE_CACHE.get(digest, key)
+    if payload is not None:
+        return _unpack_funcs(payload)
+
+    try:
+        funcs = codeparser.extract_functions(file_content, lang, timeout=10)
+    except timeout_decorator.TimeoutError:
+        print("Timeout when parsing", rel_path)
+        return None
+
+    funcs = [(func.start_line, func.code_bytes) for func in funcs]
+    EXPLODE_CACHE.put(digest, key, _pack_funcs(funcs))
+    return funcs
+
+
+def _explode_one(path, output, rel_path, lang):
+    with open(path, "rb") as f_src:
+        file_content = f_src.read()
 
+    funcs = _extract_cached(file_content, lang, rel_path)
+    if funcs is None:
+        return
 
-def explode(src_path, output):
-    for rel_path, lang in traverse_src_files(
-        src_path, ["C", "C++", "Java"], relative=True
-    ):
-        with open(src_path + "/" + rel_path, "rb") as f_src:
-            file_content = f_src.read()
+    file_ext = os.path.splitext(rel_path)[1]
+    output_path = os.path.join(output, rel_path)
+    os.makedirs(output_path, exist_ok=True)
 
+    for start_line, code_bytes in funcs:
+        func_output_path = f"{output_path}/{start_line}{file_ext}"
+        with open(func_output_path, "wb") as f_func:
+            f_func.write(code_bytes)
+
+
+def explode(src_path, output, max_workers=None):
+    work = list(_traverse_src_files(src_path, ["C", "C++", "Java"]))
+    if not work:
+        return
+
+    if multiprocessing.parent_process() is not None:
+        # already in a pool worker (e.g. loky), whose start method a nested
+        # pool can not prepare its children with
+        for path, rel_path, lang in work:
+            _explode_one(path, output, rel_path, lang)
+        return
+
+    # parsing is CPU bound and independent per file
+    paths, rel_paths, langs = zip(*work)
+    # forkserver: explode may be called from several threads at once
+    with ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context("forkserver"),
+    ) as ex:
+        for _ in ex.map(
+            _explode_one,
+            paths,
+            itertools.repeat(output, len(work)),
+            rel_paths,
+            langs,
+            chunksize=32,
+        ):
+            pass
+
+
+_REPO_LOCKS = defaultdict(threading.Lock)
+_REPO_LOCKS_GUARD = threading.Lock()
+
+
+def repo_lock(path) -> threading.Lock:
+    """Lock serializing git operations that write to the repository at path"""
+    with _REPO_LOCKS_GUARD:
+        return _REPO_LOCKS[os.path.realpath(path)]
+
+
+# _IOW(0x94, 9, int), clone the extents of a file on btrfs/xfs
+FICLONE = 0x40049409
+
+
+def _reflink_copy(src, dst):
+    """shutil.copy2 that shares the data blocks when the filesystem can"""
+    if fcntl is not None:
         try:
-            funcs = codeparser.extract_functions(file_content, lang, timeout=10)
-        except timeout_decorator.TimeoutError:
-            print("Timeout when parsing", rel_path)
-            continue
+            with open(src, "rb") as f_src, open(dst, "wb") as f_dst:
+                fcntl.ioctl(f_dst.fileno(), FICLONE, f_src.fileno())
+        except OSError:
+            pass
+        else:
+            shutil.copystat(src, dst)
+            return dst
+    return shutil.copy2(src, dst)
 
-        file_ext = os.path.splitext(rel_path)[1]
-        output_path = os.path.join(output, rel_path)
-        os.makedirs(output_path, exist_ok=True)
 
-        for func in funcs:
-            func_output_path = f"{output_path}/{func.start_line}{file_ext}"
-            with open(func_output_path, "wb") as f_func:
-                f_func.write(func.code_bytes)
+@lru_cache(maxsize=None)
+def _open_repo(real_path) -> Repo:
+    return Repo(real_path)
+
+
+def open_repo(path) -> Repo:
+    """Shared Repo for path, only use it under repo_lock(path)"""
+    return _open_repo(os.path.realpath(path))
 
 
 class TempRepo:
-    def __init__(self, src_path, version):
+    def __init__(self, src_path, version, worktree=None):
+        """
+        Check out `version` of the git repository at `src_path` in a temp dir
+        :param worktree: use a `git worktree` sharing the object database of
+            `src_path`, instead of copying the whole repository. Worktrees
+            leave submodules empty, so by default they are only used when
+            `version` has no .gitmodules
+        """
         self.src_path = src_path
         self.version = version
+        self.worktree = worktree
+
+    def _has_submodules(self, repo):
+        try:
+            repo.git.cat_file("-e", f"{self.version}:.gitmodules")
+        except git.GitCommandError:
+            return False
+        return True
 
     @staticmethod
     def clean_checkout(repo, rev, clean=True):
@@ -85,76 +276,183 @@ class TempRepo:
 
     def __enter__(self):
         self.tmpdir = tempfile.TemporaryDirectory()
-        target_path = os.path.join(self.tmpdir.name, "repo")
-        shutil.copytree(self.src_path, target_path, symlinks=True)
-        TempRepo.clean_checkout(Repo(target_path), self.version)
-        return target_path
+        self.target_path = os.path.join(self.tmpdir.name, "repo")
+        with repo_lock(self.src_path):
+            repo = open_repo(self.src_path)
+            self.use_worktree = self.worktree
+            if self.use_worktree is None:
+                self.use_worktree = not self._has_submodules(repo)
+            if self.use_worktree:
+                repo.git.worktree(
+                    "add", "--detach", "--force", self.target_path, self.version
+                )
+        if not self.use_worktree:
+            shutil.copytree(
+                self.src_path,
+                self.target_path,
+                symlinks=True,
+                copy_function=_reflink_copy,
+            )
+            TempRepo.clean_checkout(Repo(self.target_path), self.version)
+        return self.target_path
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self.tmpdir.cleanup()
+        try:
+            if self.use_worktree:
+                with repo_lock(self.src_path):
+                    open_repo(self.src_path).git.worktree(
+                        "remove", "--force", self.target_path
+                    )
+        finally:
+            self.tmpdir.cleanup()
 
 
 def run_hmark(target_dir):
-    out = tempfile.NamedTemporaryFile(delete=False)
+    # stdout is only progress noise, keep stderr for failed runs
     err = tempfile.NamedTemporaryFile(delete=False)
     target_dir = os.path.abspath(target_dir)
-    ret = sp.call(
-        f"{HMARK} -n -c {target_dir} ON",
-        shell=True,
-        cwd=target_dir,
-        stdout=out,
-        stderr=err,
-    )
+    with err:
+        ret = sp.call(
+            [HMARK, "-n", "-c", target_dir, "ON"],
+            cwd=target_dir,
+            stdout=sp.DEVNULL,
+            stderr=err,
+        )
     if ret == 0:
-        os.remove(out.name)
         os.remove(err.name)
 
-    return ret, (out.name, err.name)
+    return ret, (None, err.name)
+
+
+# a python string literal as repr() writes it, escapes included
+_PY_STR = r"""(?:'(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*")"""
+# every string literal, and the value that follows it if it is a dict key.
+# Matching whole literals keeps the scan from starting inside one.
+_HIDX_FILE_RE = re.compile(
+    rf"(?P<key>{_PY_STR})(?:(?P<sep>\s*:\s*)(?P<value>{_PY_STR}))?", re.DOTALL
+)
+
+
+def _patch_hidx_file(m):
+    key, sep, value = m.group("key", "sep", "value")
+    if value is None or key[1:-1] != "file" or "/" not in value:
+        return m.group(0)
+    # '.' and '/' never occur inside an escape sequence
+    dirname, basename = value[1:-1].rsplit("/", 1)
+    quote = value[0]
+    return f"{key}{sep}{quote}{dirname.replace('.', '#')}/{basename}{quote}"
 
 
 def patch_hidx(hidx):
     with open(hidx) as f:
         original = f.readlines()
 
-    hmarks = eval(original[1])
-    for entry in hmarks:
-        original_file = entry["file"]
-        original_file0, original_file1 = original_file.rsplit("/", 1)
-        original_file0 = original_file0.replace(".", "#")
-        entry["file"] = original_file0 + "/" + original_file1
+    # rewrite the "file" fields in place, no need to parse the whole list
+    hmarks = _HIDX_FILE_RE.sub(_patch_hidx_file, original[1].rstrip("\n"))
 
     with open(hidx, "w") as f:
         f.write(original[0])
-        f.write(str(hmarks))
+        f.write(hmarks)
+
+
+IOTCUBE_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Language": "zh-CN,zh;q=0.9",
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "Origin": "https://iotcube.net",
+    "Referer": "https://iotcube.net/process/type/wf1",
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-origin",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+    "X-Requested-With": "XMLHttpRequest",
+    "sec-ch-ua": '"Google Chrome";v="119", "Chromium";v="119", "Not?A_Brand";v="24"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+}
+
+# keep-alive connections shared by all uploads, cookies stay per session
+_IOTCUBE_ADAPTER = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+
+
+_CSRF_RE = re.compile(r'<meta name="csrf-token" content="([^"]+)"')
+# the JSON is embedded in a single-quoted JS string, stop at its closing
+# quote and not at an escaped one
+_RESULT_RE = re.compile(r"var objResult = JSON\.parse\('((?:\\.|[^'\\])*)'\);")
+# leaf text: _::file_path::_::vul_proj/cve_score_cwe_commit_fname@@func::fname::_
+_LEAF_RE = re.compile(r"(.*?)::(.*?)::(.*?)::(.*?)::(.*?)::(.*)", re.DOTALL)
+_VUL_ID_RE = re.compile(r"(.*?)/(.*?)_(.*?)_(.*?)_(.*?)_(.*?)@@(.*)", re.DOTALL)
+
+
+def _walk_report_tree(tree_json):
+    """Flatten the report tree into one dict per vulnerable function"""
+    stack = [tree_json]
+    tree_result = []
+    append = tree_result.append
+    while stack:
+        node = stack.pop()
+        if "text" in node:
+            # leaf node
+            leaf = _LEAF_RE.fullmatch(node["text"])
+            if leaf is None:
+                raise ValueError(f"malformed report leaf: {node['text']!r}")
+            vul_id = _VUL_ID_RE.fullmatch(leaf[4])
+            if vul_id is None:
+                raise ValueError(f"malformed vul id: {leaf[4]!r}")
+            file_path = leaf[2]
+            # redis##redis
+            # CVE-2022-33105
+            # 5.0
+            # CWE-401
+            # 586a16ad7907d9742a63cfcec464be7ac54aa495
+            # fork.c
+            # fork_create_OLD.vul
+            (
+                vul_proj,
+                cve_id,
+                score,
+                cwe_id,
+                commit_id,
+                vul_fname,
+                vul_id_func,
+            ) = vul_id.groups()
+
+            append(
+                {
+                    "file_path": file_path,
+                    "vul_proj": vul_proj,
+                    "cve_id": cve_id,
+                    "score": score,
+                    "cwe_id": cwe_id,
+                    "commit_id": commit_id,
+                    "vul_fname": vul_fname,
+                    "vul_id_func": vul_id_func,
+                }
+            )
+        else:
+            # non-leaf node
+            stack.extend(node["children"])
+    return tree_result
 
 
-def upload_hidx(hidx):
+def iotcube_session():
     sess = requests.Session()
+    sess.headers.update(IOTCUBE_HEADERS)
+    sess.mount("https://", _IOTCUBE_ADAPTER)
+    return sess
+
+
+def upload_hidx(hidx):
+    sess = iotcube_session()
 
     resp = sess.get(
         "https://iotcube.net/process/type?processType=wf1",
-        headers={
-            "Accept": "application/json",
-            "Accept-Language": "zh-CN,zh;q=0.9",
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Origin": "https://iotcube.net",
-            "Referer": "https://iotcube.net/process/type/wf1",
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors",
-            "Sec-Fetch-Site": "same-origin",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-            "X-Requested-With": "XMLHttpRequest",
-            "sec-ch-ua": '"Google Chrome";v="119", "Chromium";v="119", "Not?A_Brand";v="24"',
-            "sec-ch-ua-mobile": "?0",
-            "sec-ch-ua-platform": '"Windows"',
-        },
     )
     if resp.status_code != 200:
         return resp.status_code, resp
 
-    pattern = r'<meta name="csrf-token" content="([^"]+)"'
-    match = re.search(pattern, resp.text)
+    match = _CSRF_RE.search(resp.text)
     if not match:
         return -1, resp
     csrf_token = match.group(1)
@@ -164,23 +462,7 @@ def upload_hidx(hidx):
         basename = os.path.basename(hidx)
         resp = sess.post(
             "https://iotcube.net/process/upload/wf1",
-            headers={
-                "Accept": "application/json",
-                "Accept-Language": "zh-CN,zh;q=0.9",
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "Origin": "https://iotcube.net",
-                "Referer": "https://iotcube.net/process/type/wf1",
-                "Sec-Fetch-Dest": "empty",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Site": "same-origin",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-                "X-CSRF-TOKEN": csrf_token,
-                "X-Requested-With": "XMLHttpRequest",
-                "sec-ch-ua": '"Google Chrome";v="119", "Chromium";v="119", "Not?A_Brand";v="24"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"Windows"',
-            },
+            headers={"X-CSRF-TOKEN": csrf_token},
             data={"_token": csrf_token},
             files={"wf1file": (basename, f)},
         )
@@ -190,123 +472,42 @@ def upload_hidx(hidx):
     # start
     resp = sess.post(
         "https://iotcube.net/process/start/wf1",
-        headers={
-            "Accept": "application/json",
-            "Accept-Language": "zh-CN,zh;q=0.9",
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Origin": "https://iotcube.net",
-            "Referer": "https://iotcube.net/process/type/wf1",
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors",
-            "Sec-Fetch-Site": "same-origin",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-            "X-Csrf-Token": csrf_token,
-            "X-Requested-With": "XMLHttpRequest",
-            "sec-ch-ua": '"Google Chrome";v="119", "Chromium";v="119", "Not?A_Brand";v="24"',
-            "sec-ch-ua-mobile": "?0",
-            "sec-ch-ua-platform": '"Windows"',
-        },
+        headers={"X-CSRF-TOKEN": csrf_token},
     )
     if resp.status_code != 200:
         return resp.status_code, resp
     vul_file = resp.json()["file"]
 
-    # progress
-    for _ in range(10):
+    # progress, back off from 100ms up to 1s between polls
+    delay = 0.1
+    for _ in range(30):
         resp = sess.post(
             "https://iotcube.net/process/progress/wf1",
-            headers={
-                "Accept": "application/json",
-                "Accept-Language": "zh-CN,zh;q=0.9",
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "Origin": "https://iotcube.net",
-                "Referer": "https://iotcube.net/process/type/wf1",
-                "Sec-Fetch-Dest": "empty",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Site": "same-origin",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-                "X-Csrf-Token": csrf_token,
-                "X-Requested-With": "XMLHttpRequest",
-                "sec-ch-ua": '"Google Chrome";v="119", "Chromium";v="119", "Not?A_Brand";v="24"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"Windows"',
-            },
+            headers={"X-CSRF-TOKEN": csrf_token},
         )
         if resp.status_code != 200:
             return resp.status_code, resp
         if resp.json()["progress"] == 100:
             break
-        time.sleep(1)
+        time.sleep(delay)
+        delay = min(delay * 1.5, 1.0)
 
     # Get result page
     resp = sess.get(
         f"https://iotcube.net/process/report/wf1/{vul_file}",
-        headers={
-            "Accept": "application/json",
-            "Accept-Language": "zh-CN,zh;q=0.9",
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Origin": "https://iotcube.net",
-            "Referer": "https://iotcube.net/process/type/wf1",
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors",
-            "Sec-Fetch-Site": "same-origin",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-            "X-Csrf-Token": csrf_token,
-            "X-Requested-With": "XMLHttpRequest",
-            "sec-ch-ua": '"Google Chrome";v="119", "Chromium";v="119", "Not?A_Brand";v="24"',
-            "sec-ch-ua-mobile": "?0",
-            "sec-ch-ua-platform": '"Windows"',
-        },
+        headers={"X-CSRF-TOKEN": csrf_token},
     )
     if resp.status_code != 200:
         return resp.status_code, resp
 
-    pattern = r"var objResult = JSON.parse\('(.*)'\);"
-    match = re.search(pattern, resp.text)
+    match = _RESULT_RE.search(resp.text)
     if not match:
         return -2, resp
     objResult = json.loads(match.group(1))
 
     # walk tree
     tree_json = objResult["tree_json"]
-    stack = [tree_json]
-    tree_result = []
-    while stack:
-        node = stack.pop()
-        if "text" in node:
-            # leaf node
-            textsplit = node["text"].split("::", 5)
-            _, file_path, _, vul_id, fname, _ = textsplit
-            # redis##redis
-            vul_proj, vul_id = vul_id.split("/", 1)
-            # fork_create_OLD.vul
-            vul_file, vul_id_func = vul_id.split("@@", 1)
-            # CVE-2022-33105
-            # 5.0
-            # CWE-401
-            # 586a16ad7907d9742a63cfcec464be7ac54aa495
-            # fork.c
-            cve_id, score, cwe_id, commit_id, vul_fname = vul_file.split("_", 4)
-
-            tree_result.append(
-                {
-                    "file_path": file_path,
-                    "vul_proj": vul_proj,
-                    "cve_id": cve_id,
-                    "score": score,
-                    "cwe_id": cwe_id,
-                    "commit_id": commit_id,
-                    "vul_fname": vul_fname,
-                    "vul_id_func": vul_id_func,
-                }
-            )
-        else:
-            # non-leaf node
-            for child in node["children"]:
-                stack.append(child)
+    tree_result = _walk_report_tree(tree_json)
 
     # Download rawdata
     # resp = sess.get(